@@ -0,0 +1,352 @@
+"""
+Admission Control
+
+This module protects the expensive prediction endpoint from overload.
+Every prediction request downloads price history and fits a Random Forest,
+so a few clients asking for long periods with large models can saturate
+every core on the server. Requests are therefore admitted against a shared
+cost budget instead of being run unconditionally.
+
+Key Features:
+- Server-side caps on user supplied model parameters
+- Cost estimation from the requested period and model size
+- Per-client and global concurrency limits
+- Bounded FIFO wait queue with fast 429/503 rejection
+- Metrics on queue depth, in-flight work and shed requests
+
+Deployment:
+All limits are held in memory and apply per process. They are meant for a
+single threaded server process, e.g. the Flask development server or
+`gunicorn --workers 1 --threads 12 app:app`, where one controller sees every
+request. The thread count should be at least ADMISSION_MAX_QUEUE plus the
+number of requests the cost budget lets run at once, otherwise waiting
+requests queue inside the server instead of being shed here. With several
+gunicorn workers, or serverless instances such as the Vercel deployment,
+each process serves its own share of traffic, so the budget, queue and
+per-client limits only bound that process and the parameter caps remain the
+main protection.
+
+Configuration (environment variables):
+- ADMISSION_COST_BUDGET: total cost units allowed to run at once (default: 4)
+- ADMISSION_MAX_PER_CLIENT: concurrent requests per client (default: 2)
+- ADMISSION_MAX_QUEUE: requests allowed to wait for capacity (default: 8)
+- ADMISSION_QUEUE_TIMEOUT: seconds a request may wait in the queue (default: 10)
+- MAX_N_ESTIMATORS: upper bound for n_estimators (default: 500)
+- MAX_TREE_DEPTH: upper bound for max_depth (default: 32)
+- TRUST_PROXY: number of trusted reverse proxies in front of the app, used to
+  read the client address from X-Forwarded-For (default: 0, header ignored)
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Approximate number of trading days covered by each yfinance period
+PERIOD_TRADING_DAYS = {
+    '1d': 1,
+    '5d': 5,
+    '1mo': 21,
+    '3mo': 63,
+    '6mo': 126,
+    'ytd': 252,
+    '1y': 252,
+    '2y': 504,
+    '5y': 1260,
+    '10y': 2520,
+    'max': 252 * 40,
+}
+
+# Model used when the client does not send modelParams at all
+DEFAULT_MODEL_PARAMS = {
+    'n_estimators': 200,
+    'min_samples_split': 50,
+    'random_state': 1
+}
+
+# RandomForestClassifier default used when n_estimators is not sent
+SKLEARN_N_ESTIMATORS = 100
+
+MAX_N_ESTIMATORS = int(os.getenv('MAX_N_ESTIMATORS', 500))
+MAX_TREE_DEPTH = int(os.getenv('MAX_TREE_DEPTH', 32))
+
+# Fixed cost of fetching and preparing data for one ticker, in cost units
+FETCH_COST = 1.0
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a request cannot be admitted.
+
+    Attributes:
+        status (int): HTTP status code to return (429 or 503)
+        reason (str): Short machine readable reason
+        retry_after (int): Suggested seconds before retrying
+    """
+
+    def __init__(self, status, reason, retry_after=1):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def sanitize_model_params(model_params):
+    """
+    Restrict client supplied model parameters to safe values.
+
+    Only the parameters exposed by the dashboard are accepted; anything else
+    (for example n_jobs) is dropped so clients cannot change how the server
+    schedules work. Numeric values are clamped to server-side limits. Keys
+    the client did not send are left out, so scikit-learn defaults still
+    apply to them, and a missing modelParams (None) still selects
+    DEFAULT_MODEL_PARAMS in train_model.
+
+    Args:
+        model_params (dict): Raw modelParams from the request body
+
+    Returns:
+        dict: Parameters safe to pass to RandomForestClassifier, or None
+
+    Raises:
+        ValueError: If modelParams is not an object or a value is not numeric
+    """
+    if model_params is None:
+        return None
+    if not isinstance(model_params, dict):
+        raise ValueError('modelParams must be an object')
+
+    def as_int(name, low, high):
+        value = model_params[name]
+        if isinstance(value, bool):
+            raise ValueError(f'{name} must be an integer')
+        try:
+            value = int(value)
+        except (TypeError, ValueError, OverflowError):
+            raise ValueError(f'{name} must be an integer')
+        return max(low, min(high, value))
+
+    params = {}
+    if model_params.get('n_estimators') is not None:
+        params['n_estimators'] = as_int('n_estimators', 1, MAX_N_ESTIMATORS)
+    if model_params.get('min_samples_split') is not None:
+        params['min_samples_split'] = as_int('min_samples_split', 2, 10000)
+    # None is a valid value for these and means no limit / random seed
+    if 'max_depth' in model_params:
+        params['max_depth'] = None if model_params['max_depth'] is None else as_int('max_depth', 1, MAX_TREE_DEPTH)
+    if 'random_state' in model_params:
+        params['random_state'] = None if model_params['random_state'] is None else as_int('random_state', 0, 2**32 - 1)
+    return params
+
+
+def validate_symbol(symbol):
+    """
+    Ensure a request asks for exactly one ticker.
+
+    yfinance downloads every ticker in a list, and splits strings on spaces
+    and commas, while estimate_cost charges for a single fetch.
+
+    Args:
+        symbol (str): Ticker symbol from the request body
+
+    Returns:
+        str: The validated symbol
+
+    Raises:
+        ValueError: If symbol is not a single ticker string
+    """
+    if not isinstance(symbol, str) or not symbol or ',' in symbol or any(c.isspace() for c in symbol):
+        raise ValueError('symbol must be a single ticker')
+    return symbol
+
+
+def estimate_cost(period, model_params):
+    """
+    Estimate the relative cost of a prediction request.
+
+    One year of data with the default 200 tree model costs one unit of
+    training on top of the fixed fetch cost.
+
+    Args:
+        period (str): yfinance period string
+        model_params (dict): Sanitized model parameters, or None for defaults
+
+    Returns:
+        float: Estimated cost in cost units
+
+    Raises:
+        ValueError: If the period is not supported
+    """
+    if not isinstance(period, str) or period not in PERIOD_TRADING_DAYS:
+        raise ValueError(f'Unsupported period: {period}')
+    days = PERIOD_TRADING_DAYS[period]
+    if model_params is None:
+        model_params = DEFAULT_MODEL_PARAMS
+    trees = model_params.get('n_estimators', SKLEARN_N_ESTIMATORS)
+    return FETCH_COST + (days / 252) * (trees / 200)
+
+
+class AdmissionController:
+    """
+    Admit requests against a cost budget shared by the threads of one process.
+
+    Each admitted request holds its estimated cost (capped at the full
+    budget, so a very expensive request runs alone rather than never) until
+    it finishes. Requests that do not fit wait in a bounded FIFO queue;
+    once the queue is full, or a request waits too long, it is shed.
+    """
+
+    def __init__(self, cost_budget=4.0, max_per_client=2, max_queue=8, queue_timeout=10.0):
+        """
+        Initialize the controller.
+
+        Args:
+            cost_budget (float): Total cost units allowed to run at once
+            max_per_client (int): Concurrent requests allowed per client
+            max_queue (int): Requests allowed to wait for capacity
+            queue_timeout (float): Seconds a request may wait before being shed
+        """
+        self.cost_budget = float(cost_budget)
+        self.max_per_client = max_per_client
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._in_flight_cost = 0.0
+        self._in_flight = 0
+        self._per_client = {}
+        self._max_queue_depth = 0
+        self._admitted = 0
+        self._shed = {'client_limit': 0, 'queue_full': 0, 'queue_timeout': 0}
+
+    def _fits(self, weight):
+        return self._in_flight == 0 or self._in_flight_cost + weight <= self.cost_budget
+
+    def _reject(self, status, reason, retry_after):
+        self._shed[reason] += 1
+        raise AdmissionRejected(status, reason, retry_after)
+
+    def acquire(self, client_id, cost):
+        """
+        Block until the request is admitted or raise AdmissionRejected.
+
+        Args:
+            client_id (str): Identifier of the calling client
+            cost (float): Estimated request cost
+
+        Returns:
+            float: Weight held by the request, to be passed to release()
+        """
+        weight = min(float(cost), self.cost_budget)
+        with self._cond:
+            if self._per_client.get(client_id, 0) >= self.max_per_client:
+                self._reject(429, 'client_limit', 1)
+            # Count the client immediately so queued requests also use its quota
+            self._per_client[client_id] = self._per_client.get(client_id, 0) + 1
+
+            if not self._queue and self._fits(weight):
+                self._admit(weight)
+                return weight
+
+            if len(self._queue) >= self.max_queue:
+                self._release_client(client_id)
+                self._reject(503, 'queue_full', int(self.queue_timeout) or 1)
+
+            ticket = object()
+            self._queue.append(ticket)
+            self._max_queue_depth = max(self._max_queue_depth, len(self._queue))
+            deadline = time.monotonic() + self.queue_timeout
+            while not (self._queue[0] is ticket and self._fits(weight)):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._queue.remove(ticket)
+                    self._release_client(client_id)
+                    # The head of the queue may have changed
+                    self._cond.notify_all()
+                    self._reject(503, 'queue_timeout', int(self.queue_timeout) or 1)
+                self._cond.wait(remaining)
+
+            self._queue.popleft()
+            self._admit(weight)
+            self._cond.notify_all()
+            return weight
+
+    def release(self, client_id, weight):
+        """
+        Return capacity held by a finished request.
+
+        Args:
+            client_id (str): Identifier of the calling client
+            weight (float): Value returned by acquire()
+        """
+        with self._cond:
+            self._in_flight -= 1
+            self._in_flight_cost = max(0.0, self._in_flight_cost - weight)
+            self._release_client(client_id)
+            self._cond.notify_all()
+
+    @contextmanager
+    def admit(self, client_id, cost):
+        """
+        Context manager holding admission for the duration of the block.
+
+        Args:
+            client_id (str): Identifier of the calling client
+            cost (float): Estimated request cost
+        """
+        weight = self.acquire(client_id, cost)
+        try:
+            yield
+        finally:
+            self.release(client_id, weight)
+
+    def _admit(self, weight):
+        self._in_flight += 1
+        self._in_flight_cost += weight
+        self._admitted += 1
+
+    def _release_client(self, client_id):
+        count = self._per_client.get(client_id, 0) - 1
+        if count > 0:
+            self._per_client[client_id] = count
+        else:
+            self._per_client.pop(client_id, None)
+
+    def metrics(self):
+        """
+        Snapshot of the controller state.
+
+        Configured limits are deliberately left out because the snapshot is
+        served publicly and would let clients tune floods to stay under them.
+
+        Returns:
+            dict: Queue depth, in-flight work and shed counters
+        """
+        with self._cond:
+            return {
+                'queueDepth': len(self._queue),
+                'maxQueueDepth': self._max_queue_depth,
+                'inFlight': self._in_flight,
+                'inFlightCost': round(self._in_flight_cost, 3),
+                'activeClients': len(self._per_client),
+                'admitted': self._admitted,
+                'shed': dict(self._shed),
+                'shedTotal': sum(self._shed.values())
+            }
+
+
+def controller_from_env():
+    """
+    Build an AdmissionController configured from environment variables.
+
+    Returns:
+        AdmissionController: Configured controller
+    """
+    return AdmissionController(
+        cost_budget=float(os.getenv('ADMISSION_COST_BUDGET', 4)),
+        max_per_client=int(os.getenv('ADMISSION_MAX_PER_CLIENT', 2)),
+        max_queue=int(os.getenv('ADMISSION_MAX_QUEUE', 8)),
+        queue_timeout=float(os.getenv('ADMISSION_QUEUE_TIMEOUT', 10))
+    )
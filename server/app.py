@@ -11,6 +11,7 @@ Key Features:
 - News sentiment analysis
 - Watchlist management
 - Symbol search functionality
+- Admission control and load shedding for prediction requests
 
 Dependencies:
 - Flask: Web framework
@@ -24,6 +25,7 @@ Dependencies:
 
 from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 import pandas as pd
 import numpy as np
 import yfinance as yf
@@ -35,6 +37,10 @@ import os
 from datetime import datetime, timedelta
 import io
 from sentiment_analyzer import SentimentAnalyzer
+from admission_control import (
+    AdmissionRejected, DEFAULT_MODEL_PARAMS, controller_from_env,
+    estimate_cost, sanitize_model_params, validate_symbol
+)
 import nltk
 from dotenv import load_dotenv
 
@@ -54,6 +60,13 @@ except LookupError:
 # Initialize Flask application
 app = Flask(__name__)
 
+# Number of trusted reverse proxies in front of the app. When set, the client
+# address is taken from the X-Forwarded-For entry appended by the outermost
+# trusted proxy instead of the client supplied leftmost entry.
+TRUST_PROXY = int(os.getenv('TRUST_PROXY', 0))
+if TRUST_PROXY > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUST_PROXY)
+
 # Configure CORS to allow requests from specific origins
 CORS(app, resources={
     r"/api/*": {
@@ -72,6 +85,18 @@ CORS(app, resources={
 # Initialize sentiment analyzer
 sentiment_analyzer = SentimentAnalyzer()
 
+# Initialize admission control for expensive prediction requests (per process)
+admission = controller_from_env()
+
+def get_client_id():
+    """
+    Identify the calling client for per-client limits.
+    
+    Returns:
+        str: Client address
+    """
+    return request.remote_addr or 'unknown'
+
 def process_data_for_prediction(data):
     """
     Process stock data for machine learning prediction.
@@ -113,11 +138,7 @@ def train_model(data, model_params=None):
         tuple: (trained model, list of predictor names)
     """
     if model_params is None:
-        model_params = {
-            'n_estimators': 200,
-            'min_samples_split': 50,
-            'random_state': 1
-        }
+        model_params = dict(DEFAULT_MODEL_PARAMS)
     
     # Define predictor variables
     predictors = ['Close', 'Volume', 'Open', 'High', 'Low']
@@ -146,59 +167,114 @@ def predict():
         "modelParams": {}
     }
     
+    modelParams are capped server-side and each request is admitted against
+    a shared cost budget. Overloaded requests are rejected with 429 (client
+    concurrency limit) or 503 (queue full or queue wait timed out).
+    
     Returns:
         JSON response with prediction results
     """
     try:
-        data = request.json
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({
+                'success': False,
+                'error': 'Request body must be a JSON object'
+            }), 400
         symbol = data.get('symbol', '^GSPC')
         period = data.get('period', '1y')
-        model_params = data.get('modelParams', {})
         
-        # Fetch historical data
-        stock_data = yf.download(symbol, period=period)
-        
-        # Process data and train model
-        processed_data = process_data_for_prediction(stock_data)
-        model, predictors = train_model(processed_data, model_params)
-        
-        # Make prediction for latest data point
-        latest_data = processed_data.iloc[-1:][predictors]
-        prediction = model.predict(latest_data)[0]
-        probability = model.predict_proba(latest_data)[0][1]
-        
-        # Calculate feature importance
-        feature_importance = [
-            {"name": predictors[i], "importance": imp} 
-            for i, imp in enumerate(model.feature_importances_)
-        ]
-        feature_importance = sorted(feature_importance, key=lambda x: x["importance"], reverse=True)[:6]
-        
-        # Calculate expected price change
-        avg_up_change = processed_data[processed_data['Target'] == 1]['Return'].mean()
-        avg_down_change = processed_data[processed_data['Target'] == 0]['Return'].mean()
-        expected_change = avg_up_change if prediction == 1 else avg_down_change
-        
-        # Calculate model accuracy
-        predictions = model.predict(processed_data[predictors])
-        accuracy = precision_score(processed_data['Target'], predictions)
+        # Validate input, cap model parameters and estimate cost before doing any work
+        try:
+            symbol = validate_symbol(symbol)
+            model_params = sanitize_model_params(data.get('modelParams', {}))
+            cost = estimate_cost(period, model_params)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
         
-        return jsonify({
-            'success': True,
-            'data': {
-                "prediction": "up" if prediction == 1 else "down",
-                "confidence": float(probability * 100),
-                "expectedChange": float(expected_change * 100),
-                "accuracy": float(accuracy * 100),
-                "features": feature_importance
-            }
+        with admission.admit(get_client_id(), cost):
+            return jsonify({
+                'success': True,
+                'data': run_prediction(symbol, period, model_params)
+            })
+    except AdmissionRejected as e:
+        response = jsonify({
+            'success': False,
+            'error': 'Too many requests' if e.status == 429 else 'Server is busy, please retry later',
+            'reason': e.reason
         })
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, e.status
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         })
 
+def run_prediction(symbol, period, model_params):
+    """
+    Fetch data, train the model and build the prediction result.
+    
+    Args:
+        symbol (str): Stock symbol
+        period (str): Time period
+        model_params (dict): Sanitized model hyperparameters
+        
+    Returns:
+        dict: Prediction results
+    """
+    # Fetch historical data
+    stock_data = yf.download(symbol, period=period)
+    
+    # Process data and train model
+    processed_data = process_data_for_prediction(stock_data)
+    model, predictors = train_model(processed_data, model_params)
+    
+    # Make prediction for latest data point
+    latest_data = processed_data.iloc[-1:][predictors]
+    prediction = model.predict(latest_data)[0]
+    probability = model.predict_proba(latest_data)[0][1]
+    
+    # Calculate feature importance
+    feature_importance = [
+        {"name": predictors[i], "importance": imp} 
+        for i, imp in enumerate(model.feature_importances_)
+    ]
+    feature_importance = sorted(feature_importance, key=lambda x: x["importance"], reverse=True)[:6]
+    
+    # Calculate expected price change
+    avg_up_change = processed_data[processed_data['Target'] == 1]['Return'].mean()
+    avg_down_change = processed_data[processed_data['Target'] == 0]['Return'].mean()
+    expected_change = avg_up_change if prediction == 1 else avg_down_change
+    
+    # Calculate model accuracy
+    predictions = model.predict(processed_data[predictors])
+    accuracy = precision_score(processed_data['Target'], predictions)
+    
+    return {
+        "prediction": "up" if prediction == 1 else "down",
+        "confidence": float(probability * 100),
+        "expectedChange": float(expected_change * 100),
+        "accuracy": float(accuracy * 100),
+        "features": feature_importance
+    }
+
+@app.route('/api/predict/metrics', methods=['GET'])
+def predict_metrics():
+    """
+    Endpoint for monitoring prediction admission control.
+    
+    Returns:
+        JSON response with queue depth, in-flight work and shed request counts
+    """
+    return jsonify({
+        'success': True,
+        'data': admission.metrics()
+    })
+
 @app.route('/api/historical', methods=['GET'])
 def get_historical_data():
     """
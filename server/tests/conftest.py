@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modules in server/ import each other by name (vercel.json sets PYTHONPATH=server)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
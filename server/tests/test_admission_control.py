@@ -0,0 +1,271 @@
+"""
+Tests for admission control on the prediction endpoint.
+
+The controller tests use small budgets and timeouts so they run quickly.
+The endpoint tests need the full server dependencies and are skipped when
+Flask or the ML stack is not installed.
+"""
+
+import threading
+import time
+
+import pytest
+
+from admission_control import (
+    AdmissionController, AdmissionRejected, MAX_N_ESTIMATORS, MAX_TREE_DEPTH,
+    estimate_cost, sanitize_model_params, validate_symbol
+)
+
+
+def wait_for(condition, timeout=2.0):
+    """Poll until condition() is true or fail the test."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            pytest.fail('condition not reached in time')
+        time.sleep(0.005)
+
+
+def start_waiter(controller, client_id, cost, results):
+    """Acquire in a background thread and record the outcome."""
+    def run():
+        try:
+            with controller.admit(client_id, cost):
+                results.append(client_id)
+        except AdmissionRejected as e:
+            results.append((client_id, e.status, e.reason))
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+# sanitize_model_params
+
+def test_sanitize_keeps_missing_params_unset():
+    assert sanitize_model_params({}) == {}
+    assert sanitize_model_params(None) is None
+
+
+def test_sanitize_clamps_and_drops_unknown_keys():
+    params = sanitize_model_params({
+        'n_estimators': 10 ** 9,
+        'min_samples_split': 0,
+        'max_depth': 10 ** 6,
+        'n_jobs': -1
+    })
+    assert params == {
+        'n_estimators': MAX_N_ESTIMATORS,
+        'min_samples_split': 2,
+        'max_depth': MAX_TREE_DEPTH
+    }
+
+
+def test_sanitize_allows_null_max_depth():
+    assert sanitize_model_params({'max_depth': None}) == {'max_depth': None}
+
+
+@pytest.mark.parametrize('model_params', [
+    [], 'abc', {'n_estimators': 'many'}, {'n_estimators': True},
+    {'n_estimators': float('inf')}, {'max_depth': float('-inf')}
+])
+def test_sanitize_rejects_invalid_values(model_params):
+    with pytest.raises(ValueError):
+        sanitize_model_params(model_params)
+
+
+# estimate_cost
+
+def test_cost_grows_with_period_and_trees():
+    assert estimate_cost('1y', None) == 2.0
+    assert estimate_cost('1y', {}) < estimate_cost('1y', None)
+    assert estimate_cost('max', {'n_estimators': 500}) > estimate_cost('1y', {'n_estimators': 500})
+
+
+@pytest.mark.parametrize('period', ['3w', ['1y'], None, 5])
+def test_cost_rejects_invalid_period(period):
+    with pytest.raises(ValueError):
+        estimate_cost(period, {})
+
+
+# validate_symbol
+
+def test_validate_symbol_accepts_single_ticker():
+    assert validate_symbol('^GSPC') == '^GSPC'
+    assert validate_symbol('BRK-B') == 'BRK-B'
+
+
+@pytest.mark.parametrize('symbol', [['A', 'B'], 'A B', 'A,B', 'A\tB', '', None])
+def test_validate_symbol_rejects_multiple_tickers(symbol):
+    with pytest.raises(ValueError):
+        validate_symbol(symbol)
+
+
+# AdmissionController
+
+def test_per_client_limit_returns_429():
+    controller = AdmissionController(cost_budget=10, max_per_client=1, max_queue=4, queue_timeout=1)
+    weight = controller.acquire('a', 1)
+    with pytest.raises(AdmissionRejected) as excinfo:
+        controller.acquire('a', 1)
+    assert excinfo.value.status == 429
+    assert excinfo.value.reason == 'client_limit'
+
+    # Other clients are unaffected
+    controller.release('b', controller.acquire('b', 1))
+    controller.release('a', weight)
+    assert controller.metrics()['shed']['client_limit'] == 1
+
+
+def test_full_queue_returns_503():
+    controller = AdmissionController(cost_budget=1, max_per_client=5, max_queue=1, queue_timeout=2)
+    weight = controller.acquire('a', 1)
+    results = []
+    waiter = start_waiter(controller, 'b', 1, results)
+    wait_for(lambda: controller.metrics()['queueDepth'] == 1)
+
+    with pytest.raises(AdmissionRejected) as excinfo:
+        controller.acquire('c', 1)
+    assert excinfo.value.status == 503
+    assert excinfo.value.reason == 'queue_full'
+
+    controller.release('a', weight)
+    waiter.join()
+    assert results == ['b']
+    metrics = controller.metrics()
+    assert metrics['shed']['queue_full'] == 1
+    assert metrics['maxQueueDepth'] == 1
+
+
+def test_queue_timeout_returns_503():
+    controller = AdmissionController(cost_budget=1, max_per_client=5, max_queue=4, queue_timeout=0.05)
+    weight = controller.acquire('a', 1)
+    with pytest.raises(AdmissionRejected) as excinfo:
+        controller.acquire('b', 1)
+    assert excinfo.value.status == 503
+    assert excinfo.value.reason == 'queue_timeout'
+    controller.release('a', weight)
+
+    metrics = controller.metrics()
+    assert metrics['queueDepth'] == 0
+    assert metrics['activeClients'] == 0
+    assert metrics['shed']['queue_timeout'] == 1
+
+
+def test_queued_requests_are_admitted_in_order():
+    controller = AdmissionController(cost_budget=2, max_per_client=5, max_queue=4, queue_timeout=2)
+    weight = controller.acquire('holder', 2)
+    results = []
+    first = start_waiter(controller, 'first', 2, results)
+    wait_for(lambda: controller.metrics()['queueDepth'] == 1)
+    # A cheap request must not overtake the queued expensive one
+    second = start_waiter(controller, 'second', 0.5, results)
+    wait_for(lambda: controller.metrics()['queueDepth'] == 2)
+
+    controller.release('holder', weight)
+    first.join()
+    second.join()
+    assert results == ['first', 'second']
+
+
+def test_oversized_request_runs_alone():
+    controller = AdmissionController(cost_budget=2, max_per_client=5, max_queue=4, queue_timeout=0.05)
+    weight = controller.acquire('a', 100)
+    assert weight == 2
+    with pytest.raises(AdmissionRejected):
+        controller.acquire('b', 0.5)
+    controller.release('a', weight)
+    controller.release('b', controller.acquire('b', 0.5))
+
+
+def test_capacity_is_released_after_exception():
+    controller = AdmissionController(cost_budget=1, max_per_client=1, max_queue=1, queue_timeout=0.05)
+    with pytest.raises(RuntimeError):
+        with controller.admit('a', 1):
+            raise RuntimeError('training failed')
+
+    metrics = controller.metrics()
+    assert metrics['inFlight'] == 0
+    assert metrics['inFlightCost'] == 0
+    assert metrics['activeClients'] == 0
+    with controller.admit('a', 1):
+        pass
+
+
+def test_metrics_do_not_expose_limits():
+    metrics = AdmissionController().metrics()
+    assert 'limits' not in metrics
+    assert metrics['shedTotal'] == 0
+
+
+# /api/predict
+
+@pytest.fixture
+def app_module(monkeypatch):
+    pytest.importorskip('flask')
+    pytest.importorskip('sklearn')
+    pytest.importorskip('yfinance')
+    import numpy as np
+    import pandas as pd
+    import app as app_module
+
+    def fake_download(symbol, period):
+        rows = 1100
+        rng = np.random.default_rng(0)
+        close = 100 + rng.standard_normal(rows).cumsum()
+        return pd.DataFrame({
+            'Open': close,
+            'High': close + 1,
+            'Low': close - 1,
+            'Close': close,
+            'Volume': rng.integers(1000, 2000, rows)
+        }, index=pd.date_range('2020-01-01', periods=rows))
+
+    monkeypatch.setattr(app_module.yf, 'download', fake_download)
+    monkeypatch.setattr(app_module, 'admission', AdmissionController(
+        cost_budget=4, max_per_client=1, max_queue=0, queue_timeout=0.05))
+    return app_module
+
+
+def test_predict_returns_result(app_module):
+    client = app_module.app.test_client()
+    response = client.post('/api/predict', json={
+        'symbol': 'AAPL', 'period': '5y', 'modelParams': {'n_estimators': 5}
+    })
+    assert response.status_code == 200
+    assert response.get_json()['data']['prediction'] in ('up', 'down')
+
+
+@pytest.mark.parametrize('body', [
+    ['AAPL'],
+    {'period': ['1y']},
+    {'period': 'forever'},
+    {'symbol': ['A', 'B', 'C']},
+    {'symbol': 'A B C D E'},
+    {'symbol': 'A,B'},
+    {'symbol': ''},
+    {'modelParams': {'n_estimators': 'many'}},
+    {'modelParams': {'n_estimators': float('inf')}}
+])
+def test_predict_rejects_invalid_input(app_module, body):
+    response = app_module.app.test_client().post('/api/predict', json=body)
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+def test_predict_sheds_when_busy(app_module):
+    weight = app_module.admission.acquire('other', 4)
+    try:
+        response = app_module.app.test_client().post('/api/predict', json={'period': '1y'})
+    finally:
+        app_module.admission.release('other', weight)
+    assert response.status_code == 503
+    assert response.headers['Retry-After']
+    assert response.get_json()['reason'] == 'queue_full'
+
+
+def test_predict_metrics(app_module):
+    response = app_module.app.test_client().get('/api/predict/metrics')
+    data = response.get_json()['data']
+    assert 'queueDepth' in data
+    assert 'limits' not in data